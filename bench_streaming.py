@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Peak-memory benchmark for streaming.py.
+
+For each roster size a synthetic roster (CSV) and photo folder are generated in
+a temp directory, then a fresh Python process runs run_streaming() over it and
+reports its peak RSS. Streaming mode is working if the peak stays flat as the
+roster grows.
+
+    python bench_streaming.py                  # 500 and 5000 rows, both modes
+    python bench_streaming.py --rows 500 50000 --mode null
+
+Two output modes are measured:
+
+  files  the default per-file path: every card is written to the target folder
+         (atomically, as in a real run) and deleted once the next one is done,
+         so scratch space stays at one card (~0.5 MB)
+  null   cards are built and serialised exactly as in a real run, but written
+         to a null sink instead of disk
+"""
+import io
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+from PIL import Image
+
+REPO = Path(__file__).resolve().parent
+MAX_GROWTH = 0.15  # allowed peak-RSS growth between the smallest and largest roster
+MODES = ("files", "null")
+
+
+# ----------------------------
+# Synthetic data
+# ----------------------------
+def synthetic_name(i):
+    # safeName keeps letters only, so names are spelled out in base 26
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    first, last = "", ""
+    a, b = i, i * 7919 + 13
+    for _ in range(4):
+        first += letters[a % 26]
+        last += letters[b % 26]
+        a //= 26
+        b //= 26
+    return f"{first.title()} {last.title()}son"
+
+
+def make_workspace(root, rows):
+    photos = root / "photos"
+    photos.mkdir()
+    photo = Image.new("RGB", (64, 80), (120, 90, 60))
+    with open(root / "roster.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Name to be displayed", "Year", "Major", "Caption"])
+        for i in range(rows):
+            name = synthetic_name(i)
+            photo.save(photos / f"{name}.jpg", quality=70)
+            writer.writerow([name, f"Year {i % 4 + 1}", "Computer Science and Business",
+                             "An example caption that is long enough to need a line break or two"])
+
+    config = {
+        "column": {"displayName": "Name to be displayed", "year": "Year", "major": "Major", "caption": "Caption"},
+        "location": {
+            "excel": str(root / "roster.csv"),
+            "template": str(REPO / "templates" / "door_card.pptx"),
+            "font": str(REPO / "font" / "DIN-Condensed-Bold.ttf"),
+            "photo": str(photos),
+            "target": str(root / "pptx"),
+        },
+    }
+    with open(root / "config.json", "w") as f:
+        json.dump(config, f, indent=4)
+
+
+# ----------------------------
+# Child process
+# ----------------------------
+class NullBundle:
+    """
+    CardBundle stand-in that serialises every card and throws the bytes away.
+    """
+
+    path = os.devnull
+
+    def __init__(self):
+        self.bytes_written = 0
+
+    def __contains__(self, safe_name):
+        return False
+
+    def carry_over(self, safe_name, key):
+        return False
+
+    def add(self, safe_name, prs, key=None):
+        sink = _CountingSink()
+        prs.save(sink)
+        self.bytes_written += sink.count
+
+
+class _CountingSink(io.RawIOBase):
+    def __init__(self):
+        self.count = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.count += len(b)
+        return len(b)
+
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class DeleteWrittenCards:
+    """
+    Wraps main.CreateDoorcard for the per-file path: the previous card is
+    deleted before the next one is built, so only one card is ever on disk.
+    """
+
+    def __init__(self, create):
+        self.create = create
+        self.bytes_written = 0
+        self._last = None
+
+    def __call__(self, name, *args, **kwargs):
+        import main
+
+        if self._last is not None:
+            self.bytes_written += os.path.getsize(self._last)
+            os.remove(self._last)
+            self._last = None
+        result, digest = self.create(name, *args, **kwargs)
+        if result == True:
+            self._last = os.path.join(main.PptxDestination, main.GetSafeName(name))
+        return result, digest
+
+
+def run_child(mode):
+    import contextlib
+    import main
+    import streaming
+
+    bundle = NullBundle() if mode == "null" else None
+    writer = None
+    if bundle is None:
+        writer = main.CreateDoorcard = DeleteWrittenCards(main.CreateDoorcard)
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        created, skipped, failed = streaming.run_streaming("roster.csv", bundle=bundle)
+    print(json.dumps({
+        "created": created, "failed": failed, "seconds": time.perf_counter() - start,
+        "peak_rss_mb": peak_rss_mb(), "bytes": (bundle or writer).bytes_written,
+    }))
+
+
+# ----------------------------
+# Parent process
+# ----------------------------
+def bench(rows, mode, keep=False):
+    root = Path(tempfile.mkdtemp(prefix=f"doorcard_bench_{mode}_{rows}_"))
+    try:
+        make_workspace(root, rows)
+        env = dict(os.environ, PYTHONPATH=str(REPO) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        out = subprocess.run([sys.executable, str(Path(__file__).resolve()), "--child", mode],
+                             cwd=root, env=env, check=True, stdout=subprocess.PIPE, text=True)
+        return json.loads(out.stdout.strip().splitlines()[-1])
+    finally:
+        if keep:
+            print(f"  workspace kept at {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak RSS of streaming.py for growing roster sizes.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--mode", choices=MODES, nargs="+", default=list(MODES),
+                        help="output paths to measure (default: all)")
+    parser.add_argument("--keep", action="store_true", help="keep the generated workspaces")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        sys.exit(0)
+
+    ok = True
+    for mode in args.mode:
+        results = []
+        print(f"\n[{mode}]")
+        print(f"{'rows':>8} {'created':>8} {'seconds':>8} {'cards/s':>8} {'peak RSS':>10}")
+        for rows in sorted(args.rows):
+            r = bench(rows, mode, args.keep)
+            results.append((rows, r))
+            print(f"{rows:>8} {r['created']:>8} {r['seconds']:>8.1f} {r['created'] / r['seconds']:>8.1f} "
+                  f"{r['peak_rss_mb']:>8.1f}MB")
+
+        smallest, largest = results[0][1]["peak_rss_mb"], results[-1][1]["peak_rss_mb"]
+        growth = largest / smallest - 1
+        print(f"Peak RSS growth from {results[0][0]} to {results[-1][0]} rows: {growth:+.1%}")
+        if len(results) > 1 and growth > MAX_GROWTH:
+            print(f"FAIL: peak RSS grew by more than {MAX_GROWTH:.0%}")
+            ok = False
+
+    if not ok:
+        sys.exit(1)
+    print("\nOK: peak RSS stays flat")
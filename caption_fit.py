@@ -0,0 +1,119 @@
+from PIL import ImageFont
+from pptx.enum.text import MSO_AUTO_SIZE
+from pptx.util import Pt
+
+# Caption defaults, taken from the Caption placeholder in templates/door_card.pptx
+MAX_SIZE_PT  = 60.0
+MIN_SIZE_PT  = 12.0
+STEP_PT      = 0.5
+LINE_SPACING = 0.9   # the placeholder uses 90% line spacing
+SPACE_BEFORE_PT = 22.32  # the placeholder's inherited spcBef, added above every paragraph
+WIDTH_SLACK  = 0.97  # leave a little room for kerning/rendering differences between PowerPoint and LibreOffice
+
+EMU_PER_PT = 12700
+REFERENCE_SIZE = 1000  # glyph advances are measured once at this size and scaled linearly
+
+
+class CaptionFitter:
+    """
+    Fits caption text into a placeholder box using the card font's metrics.
+
+    The font is loaded once and glyph advance widths are cached, so measuring
+    a caption is just a sum of cached numbers. The largest size that fits is
+    found by binary search over font size, with greedy word wrapping deciding
+    the line breaks at each candidate size.
+    """
+
+    def __init__(self, font_path, max_size=MAX_SIZE_PT, min_size=MIN_SIZE_PT,
+                 step=STEP_PT, line_spacing=LINE_SPACING, space_before=SPACE_BEFORE_PT):
+        self.max_size = max_size
+        self.min_size = min_size
+        self.step = step
+        self.space_before = space_before
+        self._font = ImageFont.truetype(font_path, REFERENCE_SIZE)
+        ascent, descent = self._font.getmetrics()
+        self._line_height = (ascent + descent) / REFERENCE_SIZE * line_spacing  # per pt of font size
+        self._advances = {}
+        self._words = {}
+        self._space = self._char_width(" ")
+
+    def _char_width(self, ch):
+        width = self._advances.get(ch)
+        if width is None:
+            width = self._advances[ch] = self._font.getlength(ch) / REFERENCE_SIZE
+        return width
+
+    def _word_width(self, word):
+        # Width of a word at 1pt; captions reuse many words across the roster
+        width = self._words.get(word)
+        if width is None:
+            width = self._words[word] = sum(self._char_width(ch) for ch in word)
+        return width
+
+    def _line_count(self, paragraphs, size, box_width):
+        """
+        Number of lines the text wraps to at `size`, or None if a single word
+        is wider than the box.
+        """
+        max_width = box_width / size
+        lines = 0
+        for widths in paragraphs:
+            lines += 1
+            used = 0.0
+            for width in widths:
+                if width > max_width:
+                    return None
+                if used and used + self._space + width > max_width:
+                    lines += 1
+                    used = width
+                else:
+                    used += (self._space if used else 0.0) + width
+        return lines
+
+    def fit(self, text, box_width, box_height):
+        """
+        Largest font size (in pt, a multiple of `step`) at which `text` fits a
+        box of `box_width` x `box_height` pt. Falls back to `min_size` (with a
+        warning) if the text does not fit even then.
+        """
+        paragraphs = [[self._word_width(w) for w in line.split()] for line in str(text).split("\n")]
+        box_width *= WIDTH_SLACK
+        # Paragraph spacing is a fixed amount, so it does not shrink with the font
+        box_height -= len(paragraphs) * self.space_before
+
+        lo = int(self.min_size / self.step)
+        hi = int(self.max_size / self.step)
+        best = None
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            size = mid * self.step
+            lines = self._line_count(paragraphs, size, box_width)
+            if lines is not None and lines * size * self._line_height <= box_height:
+                best = mid
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        if best is None:
+            preview = str(text) if len(str(text)) <= 40 else str(text)[:37] + "..."
+            print(f"WARNING: caption does not fit even at {self.min_size}pt and will overflow: {preview!r}")
+            best = int(self.min_size / self.step)
+        return best * self.step
+
+    def fit_placeholder(self, ph, text):
+        """
+        Set `text` on a placeholder and size its runs so the text fits the box.
+        Returns the chosen size in pt.
+        """
+        ph.text = text
+        tf = ph.text_frame
+        box_width = (ph.width - tf.margin_left - tf.margin_right) / EMU_PER_PT
+        box_height = (ph.height - tf.margin_top - tf.margin_bottom) / EMU_PER_PT
+        size = self.fit(text, box_width, box_height)
+
+        # Turn off the template's shrink-on-overflow so the renderer keeps our size
+        tf.auto_size = MSO_AUTO_SIZE.NONE
+        tf.word_wrap = True
+        for paragraph in tf.paragraphs:
+            for run in paragraph.runs:
+                run.font.size = Pt(size)
+        return size
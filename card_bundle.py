@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import hashlib
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional
+
+import caption_fit
+
+# Name of the JSON entry mapping each safeName to the key of the inputs it was built from
+BUNDLE_INDEX = "index.json"
+# Bump whenever CreateDoorcard changes how a card is built, so existing bundles are rebuilt
+CARD_FORMAT = 2
+
+
+def card_key(data_dict: Dict[str, object], photo_path: str, template_path: str, font_path: str) -> str:
+    """
+    Fingerprint of everything a card is built from: its field values, the
+    size/mtime of its photo, the template and the caption font, the caption
+    fitting settings and CARD_FORMAT. If the key is unchanged the card in the
+    previous bundle can be reused as-is.
+    """
+    photo = os.stat(photo_path)
+    template = os.stat(template_path)
+    font = os.stat(font_path)
+    payload = json.dumps({
+        "format": CARD_FORMAT,
+        "fields": {k: str(v) for k, v in sorted(data_dict.items())},
+        "photo": [os.path.basename(photo_path), photo.st_size, photo.st_mtime_ns],
+        "template": [template.st_size, template.st_mtime_ns],
+        "font": [font.st_size, font.st_mtime_ns],
+        "caption_fit": [caption_fit.MAX_SIZE_PT, caption_fit.MIN_SIZE_PT, caption_fit.STEP_PT,
+                        caption_fit.LINE_SPACING, caption_fit.SPACE_BEFORE_PT, caption_fit.WIDTH_SLACK],
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class CardBundle:
+    """
+    Writes every generated card into one ZIP archive instead of one file per
+    resident. Each card is written as one archive entry as soon as it is built
+    (no temp files), and entries are named by safeName so a single card can be
+    pulled out with extract_card().
+
+    The new archive is written next to the old one as `<bundle>.partial` and
+    only replaces it on close(), so cards whose inputs have not changed can be
+    copied across from the previous bundle without being rebuilt. If the run
+    dies before close(), the previous bundle is left untouched.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._partial = self.path.with_name(self.path.name + ".partial")
+
+        self._previous = None
+        self._previous_index = {}
+        if self.path.exists():
+            try:
+                self._previous = zipfile.ZipFile(self.path)
+                self._previous_index = json.loads(self._previous.read(BUNDLE_INDEX))
+            except (zipfile.BadZipFile, KeyError, ValueError) as e:
+                print(f"Previous bundle {self.path} could not be read ({e}); rebuilding all cards")
+                self._previous = None
+                self._previous_index = {}
+
+        # Cards are already deflated PPTX files, so entries are stored as-is
+        self._fp = open(self._partial, "wb")
+        self._zip = zipfile.ZipFile(self._fp, "w", compression=zipfile.ZIP_STORED)
+        self._index = {}
+
+    def __contains__(self, safe_name: str) -> bool:
+        return safe_name in self._index
+
+    def carry_over(self, safe_name: str, key: str) -> bool:
+        """
+        Copy `safe_name` from the previous bundle if it was built from the same
+        inputs. Returns True if the card was carried over.
+        """
+        # Only cards listed in the previous index are trusted: an entry that is in
+        # the archive but not the index may be left over from a failed write
+        if self._previous is None or self._previous_index.get(safe_name) != key:
+            return False
+        try:
+            data = self._previous.read(safe_name)
+        except (KeyError, zipfile.BadZipFile):
+            return False
+        self._zip.writestr(self._entry(safe_name), data)
+        self._index[safe_name] = key
+        return True
+
+    def add(self, safe_name: str, prs, key: Optional[str] = None) -> None:
+        """
+        Write a python-pptx Presentation into the archive as `safe_name`.
+
+        The card is serialised in memory first and written as one entry, so if
+        prs.save() fails nothing is added to the archive.
+        """
+        buf = BytesIO()
+        prs.save(buf)
+        self._zip.writestr(self._entry(safe_name), buf.getvalue())
+        self._index[safe_name] = key
+
+    @staticmethod
+    def _entry(safe_name: str) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(safe_name, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        return info
+
+    def close(self) -> None:
+        self._zip.writestr(BUNDLE_INDEX, json.dumps(self._index, indent=1, sort_keys=True))
+        self._zip.close()
+        # Make sure the new bundle is on disk before it replaces the old one
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        self._fp.close()
+        if self._previous is not None:
+            self._previous.close()
+        os.replace(self._partial, self.path)
+
+
+def extract_card(bundle_path, safe_name: str, dest_folder=".") -> Optional[Path]:
+    """
+    Extract a single card from a bundle. Returns the extracted path, or None
+    if the bundle has no card by that name.
+    """
+    with zipfile.ZipFile(bundle_path) as zf:
+        # The index lists only cards that were written completely
+        try:
+            index = json.loads(zf.read(BUNDLE_INDEX))
+        except (KeyError, ValueError):
+            return None
+        if safe_name not in index:
+            return None
+        return Path(zf.extract(safe_name, dest_folder))
+
+
+def extract_all(bundle_path, dest_folder=".") -> int:
+    """
+    Extract every card in a bundle as a separate .pptx (e.g. into the folder
+    the PNG conversion scripts read). Returns the number of cards extracted.
+    """
+    with zipfile.ZipFile(bundle_path) as zf:
+        index = json.loads(zf.read(BUNDLE_INDEX))
+        for safe_name in sorted(index):
+            zf.extract(safe_name, dest_folder)
+    return len(index)
+
+
+if __name__ == "__main__":
+    # Optional CLI:
+    #   python card_bundle.py <bundle.zip> "<display name or safeName>" [dest_folder]
+    #   python card_bundle.py <bundle.zip> --all [dest_folder]
+    if len(sys.argv) < 3:
+        print(f"Usage: python {sys.argv[0]} <bundle.zip> \"<display name or safeName>\" [dest_folder]")
+        print(f"       python {sys.argv[0]} <bundle.zip> --all [dest_folder]")
+        sys.exit(1)
+
+    bundle_path, wanted = sys.argv[1], sys.argv[2]
+    dest = sys.argv[3] if len(sys.argv) > 3 else "."
+    if wanted == "--all":
+        count = extract_all(bundle_path, dest)
+        print(f"Extracted {count} card(s) to {Path(dest).resolve()}")
+        sys.exit(0)
+
+    from main import GetSafeName
+
+    target = wanted if wanted.endswith("_Noctua.pptx") else GetSafeName(wanted)
+    path = extract_card(bundle_path, target, dest)
+    if path is None:
+        print(f"No card named {target} in {bundle_path}")
+        sys.exit(1)
+    print(f"Extracted {path}")
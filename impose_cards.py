@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw, ImageOps
+
+# ----------------------------
+# Configuration (edit as needed)
+# ----------------------------
+INPUT_FOLDER    = Path("./2526doorcards_png")
+OUTPUT_PATH     = Path("./2526doorcards_print.pdf")  # a .pdf file, or a folder for sheet PNGs
+PAPER           = "A4"   # "A4" or "A3"
+CARDS_PER_SHEET = 2
+MARGIN_MM       = 10.0   # blank border around the whole sheet
+GUTTER_MM       = 6.0    # space between neighbouring cards (crop marks live here)
+CROP_MARKS      = True
+DPI             = 300
+WORKERS         = os.cpu_count() or 4
+
+PAPER_SIZES_MM = {
+    "A4": (210.0, 297.0),
+    "A3": (297.0, 420.0),
+}
+CROP_MARK_MM        = 4.0  # length of each crop mark
+CROP_MARK_OFFSET_MM = 1.0  # gap between the card edge and its crop mark
+JPEG_QUALITY        = 92   # sheets are embedded in the PDF as JPEG
+
+CardSource = Union[str, Path, Image.Image]
+
+
+class SheetLayout(NamedTuple):
+    size: Tuple[int, int]                   # sheet size in pixels (width, height)
+    boxes: List[Tuple[int, int, int, int]]  # card boxes (left, top, right, bottom)
+
+
+# ----------------------------
+# Helpers
+# ----------------------------
+def mm_to_px(mm: float, dpi: int) -> int:
+    return int(round(mm / 25.4 * dpi))
+
+
+def iter_card_files(root: Path) -> Iterable[Path]:
+    """
+    Card PNGs in a stable (sorted) order so reprints come out on the same sheets.
+    """
+    return sorted(p for p in root.glob("*.png") if not p.name.startswith("."))
+
+
+def batched(items: Iterable, n: int) -> Iterator[list]:
+    it = iter(items)
+    while True:
+        batch = list(islice(it, n))
+        if not batch:
+            return
+        yield batch
+
+
+def card_aspect(source: CardSource) -> float:
+    """
+    Width / height of a card. Only the header is read for files on disk.
+    """
+    if isinstance(source, Image.Image):
+        return source.width / source.height
+    with Image.open(source) as im:
+        return im.width / im.height
+
+
+def plan_layout(paper: str, cards_per_sheet: int, aspect: float,
+                margin_mm: float, gutter_mm: float, dpi: int) -> SheetLayout:
+    """
+    Pick the sheet orientation and cols x rows grid that gives each card the
+    largest printed area, then centre the grid inside the margins.
+    """
+    if paper not in PAPER_SIZES_MM:
+        raise ValueError(f"Unknown paper size '{paper}' (expected one of {', '.join(PAPER_SIZES_MM)})")
+    if cards_per_sheet < 1:
+        raise ValueError("cards_per_sheet must be at least 1")
+
+    short, long_ = (mm_to_px(v, dpi) for v in PAPER_SIZES_MM[paper])
+    margin = mm_to_px(margin_mm, dpi)
+    gutter = mm_to_px(gutter_mm, dpi)
+
+    best = None
+    for sheet_w, sheet_h in ((short, long_), (long_, short)):
+        for cols in range(1, cards_per_sheet + 1):
+            rows = -(-cards_per_sheet // cols)
+            cell_w = (sheet_w - 2 * margin - (cols - 1) * gutter) / cols
+            cell_h = (sheet_h - 2 * margin - (rows - 1) * gutter) / rows
+            if cell_w <= 0 or cell_h <= 0:
+                continue
+            card_w = min(cell_w, cell_h * aspect)
+            card_h = card_w / aspect
+            if best is None or card_w * card_h > best[0]:
+                best = (card_w * card_h, sheet_w, sheet_h, cols, rows, int(card_w), int(card_h))
+
+    if best is None:
+        raise ValueError("Margins and gutters leave no room for cards on this paper size")
+
+    _, sheet_w, sheet_h, cols, rows, card_w, card_h = best
+    grid_w = cols * card_w + (cols - 1) * gutter
+    grid_h = rows * card_h + (rows - 1) * gutter
+    x0 = (sheet_w - grid_w) // 2
+    y0 = (sheet_h - grid_h) // 2
+
+    boxes = []
+    for i in range(cards_per_sheet):
+        r, c = divmod(i, cols)
+        left = x0 + c * (card_w + gutter)
+        top = y0 + r * (card_h + gutter)
+        boxes.append((left, top, left + card_w, top + card_h))
+    return SheetLayout((sheet_w, sheet_h), boxes)
+
+
+def card_name(source: CardSource) -> str:
+    return Path(source).name if isinstance(source, (str, Path)) else "<in-memory card>"
+
+
+def load_card(source: CardSource, size: Tuple[int, int]) -> Image.Image:
+    """
+    Decode one card and scale it into its box without cropping any artwork.
+    Runs on a worker thread; Pillow releases the GIL while decoding/resizing.
+    """
+    if isinstance(source, Image.Image):
+        im = source
+    else:
+        im = Image.open(source)
+        im.draft("RGB", size)  # lets JPEG cards decode at reduced scale; no-op for PNG
+    if im.mode != "RGB":
+        im = im.convert("RGB")
+    return ImageOps.pad(im, size, color="white")
+
+
+def draw_crop_marks(draw: ImageDraw.ImageDraw, box: Tuple[int, int, int, int], dpi: int) -> None:
+    left, top, right, bottom = box
+    length = mm_to_px(CROP_MARK_MM, dpi)
+    offset = mm_to_px(CROP_MARK_OFFSET_MM, dpi)
+    width = max(1, dpi // 150)
+    for x, dx in ((left, -1), (right, 1)):
+        for y, dy in ((top, -1), (bottom, 1)):
+            # Horizontal mark in line with the card's top/bottom edge
+            draw.line([(x + dx * offset, y), (x + dx * (offset + length), y)], fill="black", width=width)
+            # Vertical mark in line with the card's left/right edge
+            draw.line([(x, y + dy * offset), (x, y + dy * (offset + length))], fill="black", width=width)
+
+
+# ----------------------------
+# Sheet writers
+# ----------------------------
+class PdfSheetWriter:
+    """
+    Minimal streaming PDF writer: every sheet is JPEG-encoded and written to
+    disk as soon as it is added, so only page offsets are kept in memory.
+
+    Pages go to a hidden `.<name>.partial` file that only becomes `path` once
+    close() has written the xref, so a failed run never leaves a PDF that looks
+    complete; abort() throws the partial file away.
+    """
+
+    def __init__(self, path: Path, dpi: int):
+        self.path = Path(path)
+        self.dpi = dpi
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._partial = self.path.with_name(f".{self.path.name}.partial")
+        self._fp = open(self._partial, "wb")
+        self._fp.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # Objects 1 (catalog) and 2 (page tree) are written on close()
+        self._offsets = {}
+        self._next_obj = 3
+        self._pages = []
+
+    def _write_obj(self, num: int, body: bytes, stream: Optional[bytes] = None) -> None:
+        self._offsets[num] = self._fp.tell()
+        self._fp.write(f"{num} 0 obj\n".encode())
+        self._fp.write(body)
+        if stream is not None:
+            self._fp.write(b"\nstream\n")
+            self._fp.write(stream)
+            self._fp.write(b"\nendstream")
+        self._fp.write(b"\nendobj\n")
+
+    def add(self, sheet: Image.Image) -> None:
+        buf = BytesIO()
+        sheet.save(buf, format="JPEG", quality=JPEG_QUALITY)
+        jpeg = buf.getvalue()
+        del buf
+
+        # Object numbers are only claimed once the page is fully written
+        image_obj, content_obj, page_obj = self._next_obj, self._next_obj + 1, self._next_obj + 2
+
+        width_pt = sheet.width * 72 / self.dpi
+        height_pt = sheet.height * 72 / self.dpi
+        content = f"q {width_pt:.2f} 0 0 {height_pt:.2f} 0 0 cm /Im0 Do Q".encode()
+
+        self._write_obj(image_obj, (
+            f"<< /Type /XObject /Subtype /Image /Width {sheet.width} /Height {sheet.height} "
+            f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg)} >>"
+        ).encode(), jpeg)
+        self._write_obj(content_obj, f"<< /Length {len(content)} >>".encode(), content)
+        self._write_obj(page_obj, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width_pt:.2f} {height_pt:.2f}] "
+            f"/Resources << /XObject << /Im0 {image_obj} 0 R >> >> /Contents {content_obj} 0 R >>"
+        ).encode())
+        self._next_obj += 3
+        self._pages.append(page_obj)
+
+    def close(self) -> None:
+        kids = " ".join(f"{n} 0 R" for n in self._pages)
+        self._write_obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        self._write_obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>".encode())
+
+        xref_at = self._fp.tell()
+        size = self._next_obj
+        self._fp.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for num in range(1, size):
+            self._fp.write(f"{self._offsets[num]:010d} 00000 n \n".encode())
+        self._fp.write(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode())
+        self._fp.close()
+        os.replace(self._partial, self.path)
+
+    def abort(self) -> None:
+        self._fp.close()
+        try:
+            os.remove(self._partial)
+        except OSError:
+            pass
+
+
+class PngSheetWriter:
+    """
+    Writes each sheet to its own PNG (sheet_0001.png, sheet_0002.png, ...).
+    """
+
+    def __init__(self, folder: Path, dpi: int):
+        self.folder = Path(folder)
+        self.dpi = dpi
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._count = 0
+
+    def add(self, sheet: Image.Image) -> None:
+        self._count += 1
+        sheet.save(self.folder / f"sheet_{self._count:04d}.png", dpi=(self.dpi, self.dpi))
+
+    def close(self) -> None:
+        pass
+
+    def abort(self) -> None:
+        pass
+
+
+# ----------------------------
+# Imposition
+# ----------------------------
+def impose(cards: Iterable[CardSource], output: Path, paper: str = PAPER,
+           cards_per_sheet: int = CARDS_PER_SHEET, margin_mm: float = MARGIN_MM,
+           gutter_mm: float = GUTTER_MM, crop_marks: bool = CROP_MARKS,
+           dpi: int = DPI, workers: int = WORKERS) -> int:
+    """
+    Tile cards onto print sheets and stream them to `output`.
+
+    `cards` may be paths to converted PNGs or PIL images rendered in memory,
+    and may be a generator. Only the cards for the sheet being composited and
+    that one sheet are held in memory, so memory stays flat for any roster
+    size. Cards for a sheet are decoded and scaled in parallel; a card that
+    cannot be read is reported as [FAIL] and left out.
+
+    `output` ending in .pdf produces one multi-page PDF; anything else is
+    treated as a folder of sheet PNGs. Returns the number of sheets written.
+    """
+    output = Path(output)
+    cards = iter(cards)
+    # The layout follows the first card that can actually be read
+    first = None
+    for source in cards:
+        try:
+            aspect = card_aspect(source)
+        except Exception as e:
+            print(f"[FAIL] {card_name(source)} ({e})")
+            continue
+        first = source
+        break
+    if first is None:
+        print("No cards to impose.")
+        return 0
+
+    layout = plan_layout(paper, cards_per_sheet, aspect, margin_mm, gutter_mm, dpi)
+    card_size = (layout.boxes[0][2] - layout.boxes[0][0], layout.boxes[0][3] - layout.boxes[0][1])
+
+    def load_or_skip(source: CardSource) -> Optional[Image.Image]:
+        try:
+            return load_card(source, card_size)
+        except Exception as e:
+            print(f"[FAIL] {card_name(source)} ({e})")
+            return None
+
+    writer = PdfSheetWriter(output, dpi) if output.suffix.lower() == ".pdf" else PngSheetWriter(output, dpi)
+    sheets = 0
+    pending = None  # sheet currently being encoded and written
+    try:
+        # Encoding a sheet (the slowest step) runs on its own thread and overlaps with
+        # compositing the next one; waiting on it before handing over the next sheet
+        # caps memory at two sheets. Writes stay in order on the single encoder thread.
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool, \
+                ThreadPoolExecutor(max_workers=1) as encoder:
+            for batch in batched(_chain_first(first, cards), cards_per_sheet):
+                # Unreadable cards are left out and the rest close up
+                loaded = [card for card in pool.map(load_or_skip, batch) if card is not None]
+                if not loaded:
+                    continue
+                sheet = Image.new("RGB", layout.size, "white")
+                if crop_marks:
+                    draw = ImageDraw.Draw(sheet)
+                    for box in layout.boxes[:len(loaded)]:
+                        draw_crop_marks(draw, box, dpi)
+                # Cards are pasted after the marks so a tight gutter never covers artwork
+                for box, card in zip(layout.boxes, loaded):
+                    sheet.paste(card, box[:2])
+                placed = len(loaded)
+                del loaded
+
+                if pending is not None:
+                    pending.result()
+                pending = encoder.submit(writer.add, sheet)
+                del sheet
+                sheets += 1
+                print(f"[OK] sheet {sheets} ({placed} card(s))")
+            if pending is not None:
+                pending.result()
+    except BaseException:
+        # Leaving the `with` has already waited for the encoder, so nothing is still writing
+        writer.abort()
+        raise
+    writer.close()
+    return sheets
+
+
+def _chain_first(first: CardSource, rest: Iterator[CardSource]) -> Iterator[CardSource]:
+    yield first
+    yield from rest
+
+
+if __name__ == "__main__":
+    # Optional CLI:
+    #   python impose_cards.py [input_folder] [output.pdf | output_folder] [--paper A3] [--per-sheet 4] ...
+    parser = argparse.ArgumentParser(description="Tile converted doorcard PNGs onto printable sheets.")
+    parser.add_argument("input", nargs="?", type=Path, default=INPUT_FOLDER)
+    parser.add_argument("output", nargs="?", type=Path, default=OUTPUT_PATH)
+    parser.add_argument("--paper", choices=sorted(PAPER_SIZES_MM), default=PAPER)
+    parser.add_argument("--per-sheet", type=int, default=CARDS_PER_SHEET)
+    parser.add_argument("--margin", type=float, default=MARGIN_MM, help="sheet margin in mm")
+    parser.add_argument("--gutter", type=float, default=GUTTER_MM, help="space between cards in mm")
+    parser.add_argument("--no-crop-marks", action="store_true")
+    parser.add_argument("--dpi", type=int, default=DPI)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        print(f"Input folder not found: {args.input}")
+        sys.exit(1)
+
+    count = impose(
+        iter_card_files(args.input),
+        args.output,
+        paper=args.paper,
+        cards_per_sheet=args.per_sheet,
+        margin_mm=args.margin,
+        gutter_mm=args.gutter,
+        crop_marks=not args.no_crop_marks,
+        dpi=args.dpi,
+        workers=args.workers,
+    )
+    print(f"\nDone. {count} sheet(s) written to {args.output.resolve()}")
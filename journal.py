@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+from pathlib import Path
+
+# Written into PptxDestination by main.py and streaming.py
+JOURNAL_NAME = "journal.jsonl"
+
+
+class JobJournal:
+    """
+    Append-only record of what happened to each roster row, one JSON object per
+    line. Outcomes are written as the run goes instead of being collected in
+    memory, so a run of any size keeps a constant footprint.
+
+    Every entry is fsync'd before record() returns, so after a crash the
+    journal says exactly which rows finished; it is what --resume and
+    --retry-failed read back (see load_session).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fp = open(self.path, "a", encoding="utf-8")
+
+    def record(self, **entry):
+        entry.setdefault("time", round(time.time(), 3))
+        self._fp.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+
+    def close(self):
+        self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_journal(path):
+    """
+    Yield the entries of a journal one at a time. A torn last line (from a run
+    that was killed mid-write) is ignored.
+    """
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def load_session(path):
+    """
+    Summarise the latest session in a journal: everything since the last
+    "start" entry that was not itself a resume or retry.
+
+    Returns (start, next_row, failed): the session's start entry (or None if
+    there is none), the first row that has not finished (rows are processed in
+    order, so this is one past the highest recorded row), and {row: entry} for
+    rows whose latest outcome is "failed".
+
+    A session whose start entry names a `bundle` wrote its cards into that
+    archive, which only exists once the run closed it; callers must not
+    resume or retry such a session as if its cards were on disk.
+    """
+    start, last_row, failed = None, None, {}
+    for entry in read_journal(path):
+        if entry.get("event") == "start":
+            if not entry.get("resume"):
+                start, last_row, failed = entry, None, {}
+            continue
+        row = entry.get("row")
+        if row is None:
+            continue
+        if last_row is None or row > last_row:
+            last_row = row
+        if entry.get("status") == "failed":
+            failed[row] = entry
+        else:
+            failed.pop(row, None)
+    return start, (last_row + 1 if last_row is not None else None), failed
+
+
+class HashingWriter:
+    """
+    Write-only file wrapper that hashes bytes (SHA-256) as they are written,
+    so the digest of a file is known without reading it back.
+
+    It deliberately has no seek(): zipfile (which prs.save() writes through)
+    then streams each entry with a data descriptor instead of seeking back to
+    patch its header, so the bytes hashed are exactly the bytes on disk.
+    """
+
+    def __init__(self, fp):
+        self._fp = fp
+        self._hash = hashlib.sha256()
+        self._pos = 0
+
+    def write(self, data):
+        self._hash.update(data)
+        self._fp.write(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        self._fp.flush()
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+@contextmanager
+def atomic_write(path):
+    """
+    Open `path` for binary writing such that it only ever appears complete:
+    data goes to a hidden temp file in the same folder, which is fsync'd and
+    renamed over `path` when the block exits cleanly. A crash mid-write leaves
+    at most a stray `.<name>.partial`, never a truncated `path`.
+
+    Yields a HashingWriter; its hexdigest() is the SHA-256 of the written file.
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.partial")
+    try:
+        with open(tmp, "wb") as f:
+            writer = HashingWriter(f)
+            yield writer
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(path.parent)
+
+
+def _fsync_dir(folder):
+    # Makes the rename itself durable; not supported (or needed) on Windows
+    if os.name != "posix":
+        return
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
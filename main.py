@@ -2,10 +2,14 @@ import pandas as pd
 import re
 import os
 import json
+import argparse
 from PIL import Image
 from logging import PlaceHolder
 from pptx import Presentation
 from pptx.util import Pt
+from card_bundle import CardBundle, card_key
+from caption_fit import CaptionFitter
+from journal import JOURNAL_NAME, JobJournal, atomic_write, load_session
 
 with open("config.json") as json_file:
     data = json.load(json_file)
@@ -20,31 +24,46 @@ with open("config.json") as json_file:
     FontLocation = data["location"]["font"]
     PhotoLocation = data["location"]["photo"]
     PptxDestination = data["location"]["target"]
+    BundleLocation = data["location"].get("bundle", PptxDestination.rstrip("/\\") + ".zip")
 
 
 def ProcessField(s):
     return re.sub(r'(?<!\w)and(?!\w)', "&", str(s)).upper()
 
 
-def create_name_mapping(df, display_col):
+_caption_fitter = None
+
+
+def GetCaptionFitter():
+    """
+    Shared CaptionFitter, so the font metrics are loaded once per run rather than once per card.
+    """
+    global _caption_fitter
+    if _caption_fitter is None:
+        _caption_fitter = CaptionFitter(FontLocation)
+    return _caption_fitter
+
+
+def create_name_mapping(df, display_col, scores=None):
     """
     Create a mapping between Excel display names and image filenames to handle edge cases.
     This helps with cases where display names might be stored differently in Excel vs image filenames.
+    If a `scores` dict is given, it is filled with the match score of each mapped name.
     """
     name_mapping = {}
-    picArr = [f for f in os.listdir(PhotoLocation) 
-              if f.endswith(('.jpg', '.jpeg', '.png')) and not f.startswith('.')]
     
     print("Creating display name mapping...")
     for index, row in df.iterrows():
         display_name = str(row[display_col]).strip()
-        if pd.isna(display_name) or display_name == '':
+        if pd.isna(row[display_col]) or display_name == '':
             continue
             
         # Try to find the best match for this display name
-        best_match = GetFileName(display_name)
+        best_match, score = GetFileNameWithScore(display_name)
         if best_match:
             name_mapping[display_name] = best_match
+            if scores is not None:
+                scores[display_name] = score
             print(f"Mapped '{display_name}' -> '{best_match}'")
         else:
             print(f"WARNING: No image found for '{display_name}'")
@@ -52,39 +71,88 @@ def create_name_mapping(df, display_col):
     return name_mapping
 
 
+_photo_cache = {}
+
+
+def IsPhotoFile(filename):
+    return filename.endswith(('.jpg', '.jpeg', '.png')) and not filename.startswith('.')
+
+
+def CleanName(s):
+    """
+    Lower-case and strip punctuation; display names and photo filenames are compared in this form.
+    """
+    return re.sub(r'[^\w\s]', '', s.lower()).strip()
+
+
+def ListPhotos():
+    """
+    List the photos in PhotoLocation together with their cleaned names.
+    The listing is cached until the folder changes, so matching a whole roster
+    does not rescan and re-clean every filename for every resident.
+    """
+    mtime = os.stat(PhotoLocation).st_mtime_ns
+    cached = _photo_cache.get(PhotoLocation)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    photos = []
+    for f in sorted(os.listdir(PhotoLocation)):
+        if IsPhotoFile(f):
+            photos.append((f, CleanName(f)))
+    _photo_cache[PhotoLocation] = (mtime, photos)
+    return photos
+
+
 def GetFileName(name):
     """
     Robust name matching function that handles edge cases like multiple people with the same first name.
     Uses a scoring system to find the best match.
     """
+    return GetFileNameWithScore(name)[0]
+
+
+def GetFileNameWithScore(name):
+    """
+    Same as GetFileName, but returns (filename, score) so callers can flag weak matches.
+    Returns (None, 0) if no picture matches.
+    """
     name = name.strip()
-    picArr = [f for f in os.listdir(PhotoLocation) 
-              if f.endswith(('.jpg', '.jpeg', '.png')) and not f.startswith('.')]
+    picArr = ListPhotos()
     
     if not picArr:
         print(f"No image files found in {PhotoLocation}")
-        return None
+        return None, 0
     
     # Clean the name for matching
-    clean_name = re.sub(r'[^\w\s]', '', name.lower()).strip()
+    clean_name = CleanName(name)
     name_words = [word for word in clean_name.split() if len(word) > 1]
     
     if not name_words:
         print(f"Invalid name format: {name}")
-        return None
+        return None, 0
     
+    # Check if this is a unique first name (helpful for first-name-only cases)
+    first_name = name_words[0]
+    first_name_count = sum(1 for _, clean_filename in picArr 
+                          if clean_filename.startswith(first_name))
+    
+    return ScoreCandidates(name, clean_name, name_words, picArr, first_name_count)
+
+
+def ScoreCandidates(name, clean_name, name_words, candidates, first_name_count):
+    """
+    Scoring loop behind GetFileNameWithScore. `candidates` is an iterable of
+    (filename, cleaned filename) pairs in filename order; it only needs to include
+    photos containing at least one of `name_words`, since no other photo can score.
+    Returns (filename, score), or (None, 0) if nothing matches.
+    """
     best_match = None
     best_score = 0
     matches = []
     
-    # Check if this is a unique first name (helpful for first-name-only cases)
-    first_name = name_words[0]
-    first_name_count = sum(1 for f in picArr 
-                          if re.sub(r'[^\w\s]', '', f.lower()).strip().startswith(first_name))
-    
-    for filename in picArr:
+    for filename, clean_filename in candidates:
         # Clean the filename for comparison
-        clean_filename = re.sub(r'[^\w\s]', '', filename.lower()).strip()
         clean_filename_no_ext = os.path.splitext(clean_filename)[0]
         filename_words = [word for word in clean_filename_no_ext.split() if len(word) > 1]
         
@@ -154,7 +222,7 @@ def GetFileName(name):
     
     if not matches:
         print(f"No picture found for '{name}' (cleaned: '{clean_name}')")
-        return None
+        return None, 0
     
     # If we have multiple matches with the same score, we need to be more specific
     if len(matches) > 1:
@@ -166,9 +234,9 @@ def GetFileName(name):
             for match in high_score_matches:
                 print(f"  - {match}")
             print(f"Choosing first match: {high_score_matches[0]}")
-            return high_score_matches[0]
+            return high_score_matches[0], max_score
     
-    return best_match
+    return best_match, best_score
 
 
 # def PrimePics():
@@ -192,6 +260,11 @@ def PrimePics():
         path = os.path.join(PhotoLocation, imagename)
         try:
             with Image.open(path) as im:
+                # Already-primed photos are left untouched: re-saving a JPEG every run
+                # loses quality and changes the file, which defeats bundle carry-over
+                if im.format == 'JPEG' and im.mode == 'RGB':
+                    im.load()  # still catches truncated/corrupt files
+                    continue
                 # Convert to RGB if necessary
                 if im.mode in ['RGBA', 'LA', 'P']:
                     im = im.convert('RGB')
@@ -216,7 +289,7 @@ def count_existing_pptx_files(df, display_col):
     
     for index, row in df.iterrows():
         display_name = str(row[display_col]).strip()
-        if pd.isna(display_name) or display_name == '':
+        if pd.isna(row[display_col]) or display_name == '':
             continue
         
         total_count += 1
@@ -226,6 +299,10 @@ def count_existing_pptx_files(df, display_col):
     return existing_count, total_count
 
 
+def GetSafeName(name):
+    return re.sub(r'[^A-z]', "", str(name)) + "_Noctua.pptx"
+
+
 def check_pptx_exists(name, force_recreate=False):
     """
     Check if a PPTX file already exists for the given name.
@@ -234,56 +311,81 @@ def check_pptx_exists(name, force_recreate=False):
     if force_recreate:
         return False
     
-    safeName = re.sub(r'[^A-z]', "", str(name)) + "_Noctua.pptx"
+    safeName = GetSafeName(name)
     pptx_path = os.path.join(PptxDestination, safeName)
     return os.path.exists(pptx_path)
 
 
-def CreateDoorcard(name, data_dict, name_mapping=None, force_recreate=False):
-    # Check if PPTX already exists
-    if check_pptx_exists(name, force_recreate):
-        return "skipped"
+def CreateDoorcard(name, data_dict, name_mapping=None, force_recreate=False, bundle=None):
+    """
+    Build the doorcard for `name` and save it to PptxDestination, or stream it
+    into `bundle` (a CardBundle) when one is given.
+
+    Returns (result, digest): result is True (created), "skipped" or False
+    (failed), and digest is the SHA-256 of the written file (None unless a
+    separate file was written).
+    """
+    safeName = GetSafeName(name)
+    
+    # Use mapping if available, otherwise use GetFileName
+    if name_mapping and name in name_mapping:
+        filename = name_mapping[name]
+    else:
+        filename = GetFileName(name)
+    
+    if bundle is None:
+        # Check if PPTX already exists
+        if check_pptx_exists(name, force_recreate):
+            return "skipped", None
+    else:
+        if safeName in bundle:
+            return "skipped", None
+        key = card_key(data_dict, os.path.join(PhotoLocation, filename), TemplateLocation, FontLocation) if filename else None
+        # Reuse the card from the previous bundle if nothing it depends on changed
+        if key and not force_recreate and bundle.carry_over(safeName, key):
+            return "skipped", None
     
     prs = Presentation(TemplateLocation)
     phs = prs.slides[0].placeholders
     
     for ph in phs:
         if ph.name == "Picture":
-            # Use mapping if available, otherwise use GetFileName
-            if name_mapping and name in name_mapping:
-                filename = name_mapping[name]
-            else:
-                filename = GetFileName(name)
-            
             if filename is None:
                 print(f"Skipping {name} - no image found")
-                return False
+                return False, None
             try:
                 ph.insert_picture(os.path.join(PhotoLocation, filename))
             except Exception as e:
                 print(f"Error inserting picture for {name}: {e}")
-                return False
+                return False, None
         else:
             try:
-                ph.text = ProcessField(data_dict[ph.name])
+                if ph.name == "Caption":
+                    # Shrink long quotes so they stay inside the Caption box
+                    GetCaptionFitter().fit_placeholder(ph, ProcessField(data_dict[ph.name]))
+                else:
+                    ph.text = ProcessField(data_dict[ph.name])
             except Exception as e:
                 print(f"Error processing field {ph.name} for {name}: {e}")
                 ph.text = str(data_dict.get(ph.name, ""))
 
-    safeName = re.sub(r'[^A-z]', "", str(name)) + "_Noctua.pptx"
+    if bundle is not None:
+        bundle.add(safeName, prs, key)
+        return True, None
+    
     if not os.path.exists(PptxDestination):
         os.makedirs(PptxDestination)
-    prs.save(os.path.join(PptxDestination, safeName))
-    return True
+    # Written via a temp file so a crash never leaves a half-written card behind,
+    # and hashed on the way out for the journal
+    with atomic_write(os.path.join(PptxDestination, safeName)) as f:
+        prs.save(f)
+    return True, f.hexdigest()
 
 
-def validate_mapping(name_mapping, df, display_col):
+def find_duplicate_mappings(name_mapping):
     """
-    Validate the name mapping and identify potential issues.
+    Find images used for more than one person. Returns {image: [display names]}.
     """
-    print("\nValidating display name mapping...")
-    
-    # Check for duplicate mappings (same image used for multiple people)
     image_to_names = {}
     for display_name, image_name in name_mapping.items():
         if image_name in image_to_names:
@@ -291,8 +393,19 @@ def validate_mapping(name_mapping, df, display_col):
         else:
             image_to_names[image_name] = [display_name]
     
+    return {img: names for img, names in image_to_names.items() if len(names) > 1}
+
+
+def validate_mapping(name_mapping, df, display_col):
+    """
+    Validate the name mapping and identify potential issues.
+    """
+    print("\nValidating display name mapping...")
+    
+    # Check for duplicate mappings (same image used for multiple people)
+    duplicates = find_duplicate_mappings(name_mapping)
+    
     # Report duplicates
-    duplicates = {img: names for img, names in image_to_names.items() if len(names) > 1}
     if duplicates:
         print("WARNING: Multiple people mapped to the same image:")
         for img, names in duplicates.items():
@@ -348,7 +461,7 @@ def handle_first_name_only_cases(name_mapping, df, display_col):
     first_name_groups = {}
     for index, row in df.iterrows():
         display_name = str(row[display_col]).strip()
-        if pd.isna(display_name) or display_name == '':
+        if pd.isna(row[display_col]) or display_name == '':
             continue
         
         first_name = display_name.split()[0].lower() if display_name.split() else display_name.lower()
@@ -385,28 +498,82 @@ def handle_first_name_only_cases(name_mapping, df, display_col):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate doorcards from the Excel roster in config.json.")
+    parser.add_argument("--bundle", nargs="?", const=BundleLocation, default=None, metavar="ZIP",
+                        help=f"write all cards into one ZIP archive instead of separate files (default: {BundleLocation})")
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild every card, even ones that already exist or are unchanged in the bundle")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from the first row it did not finish")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="only redo the rows that failed in the last run")
+    args = parser.parse_args()
+    
+    journal_path = os.path.join(PptxDestination, JOURNAL_NAME)
+    start_row = None
+    retry_rows = None
+    if args.resume or args.retry_failed:
+        if args.bundle:
+            print("--resume/--retry-failed work on separate PPTX files; a --bundle run already reuses unchanged cards")
+            exit(1)
+        session, next_row, failed_rows = load_session(journal_path)
+        if session is None:
+            print(f"No previous run recorded in {journal_path}")
+            exit(1)
+        if session.get("bundle"):
+            # Its cards only exist in a bundle that was never closed; they are not on disk
+            print(f"The last run wrote to {session['bundle']}; rerun it with --bundle (unchanged cards are reused)")
+            exit(1)
+        if args.retry_failed:
+            retry_rows = set(failed_rows)
+            print(f"\nRetrying {len(retry_rows)} failed row(s) from {journal_path}")
+        else:
+            start_row = next_row or 0
+            print(f"\nResuming at roster row {start_row} (rows before it finished in the previous run)")
+    
     df = pd.read_excel(ExcelLocation)
+    # Journal rows are spreadsheet row numbers (row 1 is the header), shared with streaming.py
+    if start_row is not None:
+        df = df[df.index + 2 >= start_row]
+    elif retry_rows is not None:
+        df = df[(df.index + 2).isin(retry_rows)]
     PrimePics()
     
-    # Count existing PPTX files
-    existing_count, total_count = count_existing_pptx_files(df, DisplayCol)
-    print(f"\nFound {existing_count} existing PPTX files out of {total_count} total entries")
-    print(f"Will create {total_count - existing_count} new PPTX files")
-    
-    # Ask user if they want to force recreate all files
-    if existing_count > 0:
-        print(f"\nSome PPTX files already exist. Options:")
-        print("1. Skip existing files (recommended)")
-        print("2. Force recreate all files")
-        response = input("Choose option (1 or 2): ").strip()
-        force_recreate = response == "2"
+    bundle = None
+    if start_row is not None or retry_rows is not None:
+        # Same choice as the run being continued; no prompts so it can be rerun unattended
+        force_recreate = bool(session.get("force_recreate"))
+    elif args.bundle:
+        # Unchanged cards are carried over from the previous bundle, so there is nothing to prompt about
+        force_recreate = args.force
+        bundle = CardBundle(args.bundle)
         if force_recreate:
-            print("Will force recreate all files (existing files will be overwritten)")
+            print(f"\nWriting all doorcards into {args.bundle} (rebuilding every card)")
         else:
-            print("Will skip existing files and only create new ones")
+            print(f"\nWriting all doorcards into {args.bundle} (unchanged cards are reused from the previous bundle)")
+    elif args.force:
+        force_recreate = True
+        print("\nWill force recreate all files (existing files will be overwritten)")
     else:
-        force_recreate = False
-        print("No existing PPTX files found. Will create all files.")
+        # Count existing PPTX files
+        existing_count, total_count = count_existing_pptx_files(df, DisplayCol)
+        print(f"\nFound {existing_count} existing PPTX files out of {total_count} total entries")
+        print(f"Will create {total_count - existing_count} new PPTX files")
+        
+        # Ask user if they want to force recreate all files
+        if existing_count > 0:
+            print(f"\nSome PPTX files already exist. Options:")
+            print("1. Skip existing files (recommended)")
+            print("2. Force recreate all files")
+            response = input("Choose option (1 or 2): ").strip()
+            force_recreate = response == "2"
+            if force_recreate:
+                print("Will force recreate all files (existing files will be overwritten)")
+            else:
+                print("Will skip existing files and only create new ones")
+        else:
+            force_recreate = False
+            print("No existing PPTX files found. Will create all files.")
     
     # Create name mapping to handle edge cases
     name_mapping = create_name_mapping(df, DisplayCol)
@@ -425,10 +592,11 @@ if __name__ == "__main__":
         print("3. Update the Excel file to match image naming conventions")
         print("4. Or continue and manually fix any incorrect assignments later")
         
-        response = input("\nContinue anyway? (y/n): ")
-        if response.lower() != 'y':
-            print("Exiting...")
-            exit(1)
+        if start_row is None and retry_rows is None:
+            response = input("\nContinue anyway? (y/n): ")
+            if response.lower() != 'y':
+                print("Exiting...")
+                exit(1)
     
     total = len(df)
     success = 0
@@ -436,11 +604,17 @@ if __name__ == "__main__":
     
     print(f"\nProcessing {total} doorcards...")
     
+    journal = JobJournal(journal_path)
+    journal.record(event="start", roster=ExcelLocation, force_recreate=force_recreate,
+                   resume=start_row is not None or retry_rows is not None, bundle=args.bundle)
+    
     for i, row in df.iterrows():
+        row_number = i + 2
         try:
             display_name = str(row[DisplayCol]).strip()
-            if pd.isna(display_name) or display_name == '':
+            if pd.isna(row[DisplayCol]) or display_name == '':
                 print(f"Skipping row {i}: Empty display name")
+                journal.record(row=row_number, status="skipped", reason="empty display name")
                 continue
             
             # Use the mapping if available, otherwise fall back to GetFileName
@@ -453,9 +627,10 @@ if __name__ == "__main__":
             
             if not image_filename:
                 print(f"Skipping {display_name} - no image found")
+                journal.record(row=row_number, name=display_name, status="failed", reason="no image found")
                 continue
             
-            result = CreateDoorcard(
+            result, output_hash = CreateDoorcard(
                 display_name,
                 {
                     "Name": row[DisplayCol],
@@ -464,20 +639,37 @@ if __name__ == "__main__":
                     "Caption": row[CaptionCol]
                 },
                 name_mapping,
-                force_recreate
+                force_recreate,
+                bundle
             )
             
             if result == "skipped":
                 skipped += 1
-                print(f"Skipped {display_name} - PPTX already exists")
+                if bundle is not None:
+                    print(f"Skipped {display_name} - unchanged since the previous bundle")
+                else:
+                    print(f"Skipped {display_name} - PPTX already exists")
+                journal.record(row=row_number, name=display_name, status="skipped", image=image_filename)
             elif result == True:
                 success += 1
                 print(f"Created doorcard for {display_name} using image: {image_filename}")
+                journal.record(row=row_number, name=display_name, status="created", image=image_filename,
+                               hash=output_hash)
             else:
                 print(f"Failed to create doorcard for {display_name}")
+                journal.record(row=row_number, name=display_name, status="failed", image=image_filename,
+                               reason="could not build card (see log)")
                 
         except Exception as e:
             print(f"Error at {row[DisplayCol] if 'row' in locals() and DisplayCol in row else 'unknown'}: {e}")
+            journal.record(row=row_number, status="failed", reason=str(e))
+    
+    journal.record(event="end", created=success, skipped=skipped)
+    journal.close()
+    
+    if bundle is not None:
+        bundle.close()
+        print(f"\nBundle written to {args.bundle}")
     
     print(f"\nCreation completed: {success} new / {skipped} skipped / {total} total")
     
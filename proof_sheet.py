@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+import os
+import sys
+import html
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+from pptx import Presentation
+
+from caption_fit import EMU_PER_PT
+from main import (
+    DisplayCol, YearCol, MajorCol, CaptionCol,
+    ExcelLocation, TemplateLocation, FontLocation, PhotoLocation,
+    GetCaptionFitter, ProcessField, create_name_mapping, find_duplicate_mappings, validate_mapping,
+)
+
+# ----------------------------
+# Configuration (edit as needed)
+# ----------------------------
+PROOF_FOLDER        = Path("./2526_proof")
+THUMB_WIDTH         = 480   # px; height follows the template's aspect ratio
+LOW_SCORE_THRESHOLD = 700   # matches scoring below this (see GetFileName) are flagged
+MIN_FONT_PX         = 6
+WORKERS             = os.cpu_count() or 4
+
+Record = Tuple[str, Dict[str, object]]  # (display name, {"Name", "Year", "Major", "Caption"})
+Box = Tuple[int, int, int, int]         # (left, top, right, bottom) in px
+
+
+class TemplateLayout(NamedTuple):
+    size: Tuple[int, int]                       # thumbnail size in px
+    boxes: Dict[str, Box]                       # placeholder boxes in px
+    px_per_pt: float                            # thumbnail px per point on the real card
+    text_areas: Dict[str, Tuple[float, float]]  # placeholder size inside its text margins, in pt
+
+
+# ----------------------------
+# Helpers
+# ----------------------------
+def read_template_boxes(template_path: str, thumb_width: int) -> TemplateLayout:
+    """
+    Scale the template's placeholder boxes down to thumbnail pixels so the proof
+    is laid out like the real card.
+    """
+    prs = Presentation(template_path)
+    scale = thumb_width / prs.slide_width
+    size = (thumb_width, int(round(prs.slide_height * scale)))
+    boxes, text_areas = {}, {}
+    for ph in prs.slides[0].placeholders:
+        left = max(0, int(ph.left * scale))
+        top = max(0, int(ph.top * scale))
+        boxes[ph.name] = (left, top, int((ph.left + ph.width) * scale), int((ph.top + ph.height) * scale))
+        if ph.has_text_frame:
+            # Same area CaptionFitter.fit_placeholder fits into on the real card
+            tf = ph.text_frame
+            text_areas[ph.name] = ((ph.width - tf.margin_left - tf.margin_right) / EMU_PER_PT,
+                                   (ph.height - tf.margin_top - tf.margin_bottom) / EMU_PER_PT)
+    return TemplateLayout(size, boxes, scale * EMU_PER_PT, text_areas)
+
+
+def fit_font(text: str, box: Tuple[int, int, int, int], max_lines: int = 1) -> Tuple[ImageFont.FreeTypeFont, List[str]]:
+    """
+    Largest font size (up to the box height) at which `text` wraps into the box.
+    Good enough for a proof; the real card is laid out by PowerPoint.
+    """
+    size, lines = _fit_size(text, box, max_lines)
+    return _font(size), lines
+
+
+@lru_cache(maxsize=4096)
+def _fit_size(text: str, box: Tuple[int, int, int, int], max_lines: int) -> Tuple[int, List[str]]:
+    # Year/Major values repeat across the roster, so fits are cached by text and box
+    width, height = box[2] - box[0], box[3] - box[1]
+    words = text.split()
+    lo, hi = MIN_FONT_PX, max(MIN_FONT_PX, height // max_lines)
+    best = (lo, _wrap(words, _font(lo), width))
+    while lo <= hi:
+        size = (lo + hi) // 2
+        font = _font(size)
+        lines = _wrap(words, font, width)
+        if (len(lines) <= max_lines and len(lines) * font.getbbox("Ag")[3] <= height
+                and all(font.getlength(line) <= width for line in lines)):
+            best = (size, lines)
+            lo = size + 1
+        else:
+            hi = size - 1
+    return best
+
+
+_caption_lock = threading.Lock()  # the caption fitter's FreeType face is shared
+
+
+@lru_cache(maxsize=4096)
+def _caption_size_pt(text: str, area_pt: Tuple[float, float]) -> float:
+    # Same fit as the generated card, so the proof shows the caption size it will get
+    with _caption_lock:
+        return GetCaptionFitter().fit(text, *area_pt)
+
+
+def fit_caption(text: str, box: Box, area_pt: Tuple[float, float],
+                px_per_pt: float) -> Tuple[ImageFont.FreeTypeFont, List[str]]:
+    """
+    Size the caption with the card's CaptionFitter (in pt) and wrap it at the
+    matching thumbnail size, one paragraph per line break.
+    """
+    font = _font(max(1, int(round(_caption_size_pt(text, area_pt) * px_per_pt))))
+    width = box[2] - box[0]
+    lines = []
+    for paragraph in text.split("\n"):
+        lines.extend(_wrap(paragraph.split(), font, width))
+    return font, lines
+
+
+_fonts = threading.local()  # FreeType faces are not shared between worker threads
+
+
+def _font(size: int) -> ImageFont.FreeTypeFont:
+    cache = _fonts.__dict__.setdefault("by_size", {})
+    if size not in cache:
+        cache[size] = ImageFont.truetype(FontLocation, size)
+    return cache[size]
+
+
+def _wrap(words: List[str], font: ImageFont.FreeTypeFont, width: int) -> List[str]:
+    lines, line = [], ""
+    for word in words:
+        candidate = f"{line} {word}" if line else word
+        if line and font.getlength(candidate) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines or [""]
+
+
+def render_thumbnail(data_dict: Dict[str, object], photo: Optional[str], layout: TemplateLayout,
+                     flagged: bool) -> Image.Image:
+    """
+    Draw a small approximation of one doorcard: photo on the Picture box and the
+    processed fields in their text boxes. JPEG photos are decoded in draft mode
+    (DCT scaling), which is what keeps proofing fast.
+    """
+    size, boxes = layout.size, layout.boxes
+    card = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(card)
+
+    pic_box = boxes.get("Picture")
+    if pic_box:
+        pic_size = (pic_box[2] - pic_box[0], pic_box[3] - pic_box[1])
+        if photo:
+            with Image.open(os.path.join(PhotoLocation, photo)) as im:
+                im.draft("RGB", pic_size)
+                im = ImageOps.exif_transpose(im).convert("RGB")
+                card.paste(ImageOps.fit(im, pic_size, method=Image.BILINEAR), pic_box[:2])
+        else:
+            draw.rectangle(pic_box, fill="#dddddd")
+            draw.text((pic_box[0] + 8, pic_box[1] + 8), "NO IMAGE", fill="#cc0000", font=_font(18))
+
+    for field, max_lines in (("Name", 2), ("Year", 1), ("Major", 2), ("Caption", 6)):
+        box = boxes.get(field)
+        if not box:
+            continue
+        text = ProcessField(data_dict.get(field, ""))
+        if field == "Caption" and field in layout.text_areas:
+            font, lines = fit_caption(text, box, layout.text_areas[field], layout.px_per_pt)
+        else:
+            font, lines = fit_font(text, box, max_lines)
+        line_height = font.getbbox("Ag")[3]
+        y = box[1] + (box[3] - box[1] - line_height * len(lines)) // 2
+        for line in lines:
+            x = box[0] + (box[2] - box[0] - font.getlength(line)) // 2
+            draw.text((x, y), line, fill="black", font=font)
+            y += line_height
+
+    if flagged:
+        draw.rectangle((0, 0, size[0] - 1, size[1] - 1), outline="#cc0000", width=6)
+    return card
+
+
+def proof_flags(display_name: str, name_mapping: Dict[str, str], scores: Dict[str, int],
+                duplicates: Dict[str, List[str]]) -> List[str]:
+    photo = name_mapping.get(display_name)
+    if not photo:
+        return ["no image found"]
+    flags = []
+    score = scores.get(display_name)
+    if score is not None and score < LOW_SCORE_THRESHOLD:
+        flags.append(f"low match score ({score})")
+    if photo in duplicates:
+        others = [n for n in duplicates[photo] if n != display_name]
+        flags.append("image shared with " + ", ".join(others))
+    return flags
+
+
+# ----------------------------
+# Contact sheet
+# ----------------------------
+def build_proof(records: Iterable[Record], name_mapping: Dict[str, str], scores: Dict[str, int],
+                out_dir: Path = PROOF_FOLDER, thumb_width: int = THUMB_WIDTH,
+                workers: int = WORKERS) -> Path:
+    """
+    Render a thumbnail per resident from the resolved name_mapping and write a
+    single static HTML contact sheet, flagging missing, low-score and duplicate
+    matches. Returns the path to the HTML file.
+    """
+    out_dir = Path(out_dir)
+    thumbs_dir = out_dir / "thumbs"
+    thumbs_dir.mkdir(parents=True, exist_ok=True)
+
+    layout = read_template_boxes(TemplateLocation, thumb_width)
+    duplicates = find_duplicate_mappings(name_mapping)
+
+    def proof_one(item):
+        index, (display_name, data_dict) = item
+        flags = proof_flags(display_name, name_mapping, scores, duplicates)
+        thumb_name = f"{index:05d}.jpg"
+        try:
+            thumb = render_thumbnail(data_dict, name_mapping.get(display_name), layout, bool(flags))
+            thumb.save(thumbs_dir / thumb_name, quality=80)
+        except Exception as e:
+            flags.append(f"could not render: {e}")
+            thumb_name = None
+        return display_name, name_mapping.get(display_name), scores.get(display_name), flags, thumb_name
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(proof_one, enumerate(records, start=1)))
+
+    html_path = out_dir / "index.html"
+    with open(html_path, "w", encoding="utf-8") as f:
+        f.write(_render_html(results))
+    return html_path
+
+
+def _render_html(results) -> str:
+    flagged = [r for r in results if r[3]]
+    parts = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset=\"utf-8\"><title>Doorcard proof</title><style>",
+        "body{font-family:sans-serif;margin:16px}",
+        ".grid{display:grid;grid-template-columns:repeat(auto-fill,minmax(260px,1fr));gap:12px}",
+        "figure{margin:0;padding:6px;border:1px solid #ccc}figure.flagged{border:2px solid #c00;background:#fff3f3}",
+        "figure img{width:100%;display:block}figcaption{font-size:12px;margin-top:4px}",
+        ".flag{color:#c00;font-weight:bold}",
+        "</style></head><body>",
+        f"<h1>Doorcard proof</h1><p>{len(results)} residents, {len(flagged)} flagged.</p>",
+    ]
+    if flagged:
+        parts.append("<ul>")
+        for i, (name, _, _, flags, _) in enumerate(results, start=1):
+            if flags:
+                parts.append(f"<li><a href=\"#r{i}\">{html.escape(name)}</a>: {html.escape('; '.join(flags))}</li>")
+        parts.append("</ul>")
+
+    parts.append("<div class=\"grid\">")
+    for i, (name, photo, score, flags, thumb_name) in enumerate(results, start=1):
+        cls = " class=\"flagged\"" if flags else ""
+        parts.append(f"<figure id=\"r{i}\"{cls}>")
+        if thumb_name:
+            parts.append(f"<img src=\"thumbs/{thumb_name}\" loading=\"lazy\" alt=\"{html.escape(name)}\">")
+        parts.append(f"<figcaption><b>{html.escape(name)}</b><br>{html.escape(photo or '-')}"
+                     f"{f' (score {score})' if score is not None else ''}")
+        for flag in flags:
+            parts.append(f"<br><span class=\"flag\">{html.escape(flag)}</span>")
+        parts.append("</figcaption></figure>")
+    parts.append("</div></body></html>")
+    return "\n".join(parts)
+
+
+if __name__ == "__main__":
+    # Optional CLI:
+    #   python proof_sheet.py [output_folder]
+    out_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else PROOF_FOLDER
+
+    df = pd.read_excel(ExcelLocation)
+    scores = {}
+    name_mapping = create_name_mapping(df, DisplayCol, scores)
+    validate_mapping(name_mapping, df, DisplayCol)
+
+    records = []
+    for _, row in df.iterrows():
+        display_name = str(row[DisplayCol]).strip()
+        if pd.isna(row[DisplayCol]) or display_name == '':
+            continue
+        records.append((display_name, {
+            "Name": row[DisplayCol],
+            "Year": row[YearCol],
+            "Major": row[MajorCol],
+            "Caption": row[CaptionCol],
+        }))
+
+    html_path = build_proof(records, name_mapping, scores, out_dir)
+    print(f"\nProof contact sheet written to {html_path.resolve()}")
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+import gc
+import os
+import sys
+import csv
+import sqlite3
+import argparse
+from pathlib import Path
+
+import openpyxl
+
+import main
+from card_bundle import CardBundle
+from journal import JOURNAL_NAME, JobJournal, load_session
+
+# ----------------------------
+# Configuration (edit as needed)
+# ----------------------------
+INDEX_NAME   = ".photo_index.sqlite"  # written into PptxDestination
+INSERT_BATCH = 1000
+GC_EVERY     = 100   # rows between full garbage collections (see run_streaming)
+
+
+# ----------------------------
+# Roster
+# ----------------------------
+def iter_roster_rows(path, required=()):
+    """
+    Yield roster rows one at a time as {column: value} dicts. Excel files are
+    read with openpyxl in read-only mode and CSV files with csv.DictReader, so
+    the whole sheet is never loaded. Like pd.read_excel in main.py, the first
+    worksheet is read, whichever sheet was active when the file was saved.
+
+    Raises ValueError if any of the `required` columns is missing from the header.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            _check_header(path, reader.fieldnames or [], required)
+            yield from reader
+        return
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [str(h) if h is not None else "" for h in next(rows, ())]
+        _check_header(path, header, required)
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        wb.close()
+
+
+def _check_header(path, header, required):
+    missing = [col for col in required if col not in header]
+    if missing:
+        raise ValueError(f"{path} is missing column(s): {', '.join(missing)}")
+
+
+def _blank(value):
+    return value is None or str(value).strip() == ""
+
+
+# ----------------------------
+# Photo index
+# ----------------------------
+class PhotoIndex:
+    """
+    On-disk (SQLite) index of PhotoLocation used to resolve display names to
+    photos without holding the folder listing or the name mapping in memory.
+
+    Lookups give the same answer as GetFileNameWithScore: SQLite narrows the
+    photos down to those containing one of the name's words (a trigram FTS5
+    index when available, otherwise a scan in C), and the repo's scoring runs
+    on just those candidates. The index is rebuilt when the photo folder changes.
+    """
+
+    def __init__(self, path, photo_dir):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.photo_dir = photo_dir
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS mapping (display_name TEXT, filename TEXT)")
+        self.conn.execute("DELETE FROM mapping")
+        self._fts = False
+        self._refresh()
+
+    def _refresh(self):
+        stamp = str(os.stat(self.photo_dir).st_mtime_ns)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'photo_dir'").fetchone()
+        built = self.conn.execute("SELECT value FROM meta WHERE key = 'stamp'").fetchone()
+        self._fts = self._has_table("photos_fts")
+        if row and row[0] == os.path.abspath(self.photo_dir) and built and built[0] == stamp:
+            return
+
+        print(f"Indexing photos in {self.photo_dir}...")
+        cur = self.conn.cursor()
+        cur.execute("DROP TABLE IF EXISTS photos")
+        cur.execute("DROP TABLE IF EXISTS photos_fts")
+        cur.execute("CREATE TABLE photos (filename TEXT PRIMARY KEY, clean TEXT)")
+        cur.execute("CREATE INDEX photos_clean ON photos (clean)")
+
+        batch = []
+        with os.scandir(self.photo_dir) as entries:
+            for entry in entries:
+                if main.IsPhotoFile(entry.name):
+                    batch.append((entry.name, main.CleanName(entry.name)))
+                    if len(batch) >= INSERT_BATCH:
+                        cur.executemany("INSERT INTO photos VALUES (?, ?)", batch)
+                        batch = []
+        cur.executemany("INSERT INTO photos VALUES (?, ?)", batch)
+
+        try:
+            cur.execute("CREATE VIRTUAL TABLE photos_fts USING fts5(clean, tokenize='trigram')")
+            cur.execute("INSERT INTO photos_fts (rowid, clean) SELECT rowid, clean FROM photos")
+            self._fts = True
+        except sqlite3.OperationalError:
+            # SQLite older than 3.34 has no trigram tokenizer; fall back to scanning
+            self._fts = False
+
+        cur.execute("INSERT OR REPLACE INTO meta VALUES ('photo_dir', ?)", (os.path.abspath(self.photo_dir),))
+        cur.execute("INSERT OR REPLACE INTO meta VALUES ('stamp', ?)", (stamp,))
+        self.conn.commit()
+
+    def _has_table(self, name):
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+    def _candidates(self, name_words):
+        # The trigram index can only look up words of 3+ characters
+        if self._fts and all(len(w) >= 3 for w in name_words):
+            query = " OR ".join(f'"{w}"' for w in name_words)
+            return self.conn.execute(
+                "SELECT filename, clean FROM photos WHERE rowid IN "
+                "(SELECT rowid FROM photos_fts WHERE photos_fts MATCH ?) ORDER BY filename", (query,))
+        where = " OR ".join("instr(clean, ?) > 0" for _ in name_words)
+        return self.conn.execute(
+            f"SELECT filename, clean FROM photos WHERE {where} ORDER BY filename", name_words)
+
+    def lookup(self, name):
+        """
+        Same contract as GetFileNameWithScore: returns (filename, score) or (None, 0).
+        """
+        name = name.strip()
+        if self.conn.execute("SELECT 1 FROM photos LIMIT 1").fetchone() is None:
+            print(f"No image files found in {self.photo_dir}")
+            return None, 0
+
+        clean_name = main.CleanName(name)
+        name_words = [word for word in clean_name.split() if len(word) > 1]
+        if not name_words:
+            print(f"Invalid name format: {name}")
+            return None, 0
+
+        first_name = name_words[0]
+        first_name_count = self.conn.execute(
+            "SELECT COUNT(*) FROM photos WHERE clean >= ? AND clean < ?",
+            (first_name, first_name + "\U0010ffff")).fetchone()[0]
+
+        return main.ScoreCandidates(name, clean_name, name_words, self._candidates(name_words), first_name_count)
+
+    def record_mapping(self, display_name, filename):
+        self.conn.execute("INSERT INTO mapping VALUES (?, ?)", (display_name, filename))
+
+    def duplicates(self):
+        """
+        Yield (filename, [display names]) for photos mapped to more than one person.
+        """
+        self.conn.commit()
+        rows = self.conn.execute(
+            "SELECT filename FROM mapping GROUP BY filename HAVING COUNT(*) > 1 ORDER BY filename")
+        for (filename,) in rows.fetchall():
+            names = [n for (n,) in self.conn.execute(
+                "SELECT display_name FROM mapping WHERE filename = ?", (filename,))]
+            yield filename, names
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+# ----------------------------
+# Streaming run
+# ----------------------------
+def run_streaming(roster_path, force_recreate=False, bundle=None, journal_path=None, index_path=None,
+                  start_row=None, retry_rows=None):
+    """
+    Generate doorcards row by row: each roster row is read, its photo resolved
+    through the PhotoIndex, its card built and written out immediately, and its
+    outcome appended to the journal. Writing separate files, nothing grows with
+    the size of the roster; with a `bundle`, the archive keeps a small record
+    per card in memory (CardBundle._index and ZipFile.filelist) until close().
+
+    `start_row` skips rows before it (resuming an interrupted run) and
+    `retry_rows` limits the run to those row numbers (retrying failures).
+    Returns (created, skipped, failed).
+    """
+    os.makedirs(main.PptxDestination, exist_ok=True)
+    journal_path = journal_path or os.path.join(main.PptxDestination, JOURNAL_NAME)
+    index = PhotoIndex(index_path or os.path.join(main.PptxDestination, INDEX_NAME), main.PhotoLocation)
+
+    created = skipped = failed = 0
+    with JobJournal(journal_path) as journal:
+        journal.record(event="start", roster=str(roster_path), force_recreate=force_recreate,
+                       resume=start_row is not None or retry_rows is not None,
+                       bundle=str(bundle.path) if bundle is not None else None)
+        # Row numbers match the spreadsheet (row 1 is the header)
+        rows = iter_roster_rows(roster_path, required=(main.DisplayCol, main.YearCol, main.MajorCol, main.CaptionCol))
+        for row_number, row in enumerate(rows, start=2):
+            if start_row is not None and row_number < start_row:
+                continue
+            if retry_rows is not None and row_number not in retry_rows:
+                continue
+
+            # python-pptx objects form reference cycles that keep each card's lxml tree
+            # (native memory) alive; collecting periodically keeps RSS flat
+            if row_number % GC_EVERY == 0:
+                gc.collect()
+
+            raw_name = row.get(main.DisplayCol)
+            if _blank(raw_name):
+                journal.record(row=row_number, status="skipped", reason="empty display name")
+                continue
+            display_name = str(raw_name).strip()
+
+            filename, score = index.lookup(display_name)
+            if not filename:
+                failed += 1
+                print(f"Skipping {display_name} - no image found")
+                journal.record(row=row_number, name=display_name, status="failed", reason="no image found")
+                continue
+            index.record_mapping(display_name, filename)
+
+            data_dict = {
+                "Name": raw_name,
+                "Year": row.get(main.YearCol),
+                "Major": row.get(main.MajorCol),
+                "Caption": row.get(main.CaptionCol),
+            }
+            reason = None
+            try:
+                result, output_hash = main.CreateDoorcard(display_name, data_dict, {display_name: filename},
+                                                          force_recreate, bundle)
+            except Exception as e:
+                result, output_hash, reason = False, None, str(e)
+
+            if result == "skipped":
+                skipped += 1
+                journal.record(row=row_number, name=display_name, status="skipped", image=filename)
+            elif result == True:
+                created += 1
+                print(f"Created doorcard for {display_name} using image: {filename}")
+                journal.record(row=row_number, name=display_name, status="created", image=filename, score=score,
+                               hash=output_hash)
+            else:
+                failed += 1
+                print(f"Failed to create doorcard for {display_name}")
+                journal.record(row=row_number, name=display_name, status="failed", image=filename,
+                               reason=reason or "could not build card (see log)")
+
+        duplicates = list(index.duplicates())
+        if duplicates:
+            print("WARNING: Multiple people mapped to the same image:")
+            for image, names in duplicates:
+                print(f"  Image: {image}")
+                for name in names:
+                    print(f"    - {name}")
+                journal.record(event="duplicate", image=image, names=names)
+        journal.record(event="end", created=created, skipped=skipped, failed=failed)
+
+    index.close()
+    return created, skipped, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate doorcards row by row with flat memory use.")
+    parser.add_argument("roster", nargs="?", default=main.ExcelLocation, help="roster .xlsx or .csv (default: config.json)")
+    parser.add_argument("--bundle", nargs="?", const=main.BundleLocation, default=None, metavar="ZIP",
+                        help="write all cards into one ZIP archive instead of separate files")
+    parser.add_argument("--force", action="store_true", help="rebuild cards that already exist")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from the first row it did not finish")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="only redo the rows that failed in the last run")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.roster):
+        print(f"Roster not found: {args.roster}")
+        sys.exit(1)
+
+    journal_path = os.path.join(main.PptxDestination, JOURNAL_NAME)
+    force_recreate, start_row, retry_rows = args.force, None, None
+    if args.resume or args.retry_failed:
+        if args.bundle:
+            print("--resume/--retry-failed work on separate PPTX files; a --bundle run already reuses unchanged cards")
+            sys.exit(1)
+        session, next_row, failed_rows = load_session(journal_path)
+        if session is None:
+            print(f"No previous run recorded in {journal_path}")
+            sys.exit(1)
+        if session.get("bundle"):
+            # Its cards only exist in a bundle that was never closed; they are not on disk
+            print(f"The last run wrote to {session['bundle']}; rerun it with --bundle (unchanged cards are reused)")
+            sys.exit(1)
+        force_recreate = bool(session.get("force_recreate"))
+        if args.retry_failed:
+            retry_rows = set(failed_rows)
+            print(f"Retrying {len(retry_rows)} failed row(s) from {journal_path}")
+        else:
+            start_row = next_row or 0
+            print(f"Resuming at roster row {start_row} (rows before it finished in the previous run)")
+
+    main.PrimePics()
+    bundle = CardBundle(args.bundle) if args.bundle else None
+    created, skipped, failed = run_streaming(args.roster, force_recreate, bundle,
+                                             start_row=start_row, retry_rows=retry_rows)
+    if bundle is not None:
+        bundle.close()
+        print(f"\nBundle written to {args.bundle}")
+
+    print(f"\nCreation completed: {created} new / {skipped} skipped / {failed} failed")
+    print(f"Per-row outcomes: {journal_path}")
@@ -3,6 +3,8 @@ from pathlib import Path
 import pandas as pd
 import browser_cookie3
 
+from journal import atomic_write
+
 # Load the Excel file
 excel_path = 'NOCTUA Doorcards.xlsx'  # Update this path to your file
 df = pd.read_excel(excel_path)
@@ -74,12 +76,16 @@ for index, row in df.iterrows():
         file_path = images_dir / f"{image_name}.jpg"
 
         print(f"Attempting to download {image_name} from: {image_url}")
-        response = session.get(image_url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        with open(file_path, 'wb') as file:
-            file.write(response.content)
-        print(f"Downloaded {image_name}.jpg successfully ({len(response.content)} bytes)")
+        # Stream the photo to disk in chunks instead of holding the whole response in memory;
+        # atomic_write only puts it under its real name once the download has completed
+        with session.get(image_url, headers=headers, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            size = 0
+            with atomic_write(file_path) as file:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    file.write(chunk)
+                    size += len(chunk)
+        print(f"Downloaded {image_name}.jpg successfully ({size} bytes)")
         
     except KeyError as e:
         print(f"Column not found: {e}")